@@ -2,29 +2,110 @@
 import os
 import sys
 import struct
-import array
+import queue
+import itertools
+import threading
 import cv2
-import multiprocessing
+import numpy as np
 import shutil
 import subprocess
-import tempfile
-import glob
 import json
 from argparse import ArgumentParser
 from tqdm import tqdm
 
+# Optional libjpeg-turbo binding: SIMD baseline encode is several times
+# faster than a stock-libjpeg OpenCV build. Falls back to cv2.imencode.
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR, TJSAMP_420, TJFLAG_FASTDCT
+    TurboJPEG()  # probe that the native library loads
+    _have_turbojpeg = True
+except Exception:
+    _have_turbojpeg = False
+
+# Per-thread scratch state so hot-path buffers and handles survive across
+# frames; a TJCompressor handle is not safe for concurrent use.
+_worker_state = threading.local()
+
 modes = {'sd': (240, 136), 'hd': (320, 180)}
 
+# Precompiled header layout: version, image count, interval (ms)
+_BIF_HEADER = struct.Struct('<III')
+
+# preset -> (final-pass interpolation, JPEG quality, sharpen), resolved once
+# per run so the per-frame path never re-decodes the preset string.
+# pyrDown pre-decimation supplies the area averaging for 'medium'.
+# 'quality' used to mean Lanczos, but OpenCV's LANCZOS4 downscale has no
+# vectorized path and is several times slower than INTER_AREA for no visible
+# gain at thumbnail sizes; a cheap unsharp pass recovers the perceived detail.
+presets = {'fast': (cv2.INTER_LINEAR, 80, False),
+           'medium': (cv2.INTER_LINEAR, 90, False),
+           'quality': (cv2.INTER_AREA, 95, True)}
+
+def sharpen_thumbnail(frame_bgr):
+    return cv2.addWeighted(frame_bgr, 1.3, cv2.GaussianBlur(frame_bgr, (0, 0), 1.0), -0.3, 0)
+
+# cv2.imencode parameter lists, built once per quality level instead of
+# re-constructed for every frame
+_encode_params_cache = {}
+
+def encode_jpeg(frame_bgr, jpeg_quality):
+    # Throughput-oriented encoder settings: baseline (non-progressive),
+    # single-pass Huffman, 4:2:0 chroma subsampling -- visually lossless at
+    # thumbnail sizes and keeps libjpeg-turbo on its fast SIMD path.
+    if _have_turbojpeg:
+        # One persistent handle per thread: quality/Huffman table setup
+        # amortizes poorly when re-initialized for thousands of tiny frames.
+        tj = getattr(_worker_state, 'turbojpeg', None)
+        if tj is None:
+            tj = TurboJPEG()
+            _worker_state.turbojpeg = tj
+        return tj.encode(frame_bgr, quality=jpeg_quality, pixel_format=TJPF_BGR,
+                         jpeg_subsample=TJSAMP_420, flags=TJFLAG_FASTDCT)
+    encode_params = _encode_params_cache.get(jpeg_quality)
+    if encode_params is None:
+        encode_params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality,
+                         cv2.IMWRITE_JPEG_OPTIMIZE, 0,
+                         cv2.IMWRITE_JPEG_PROGRESSIVE, 0]
+        if hasattr(cv2, 'IMWRITE_JPEG_SAMPLING_FACTOR'):
+            encode_params += [cv2.IMWRITE_JPEG_SAMPLING_FACTOR, cv2.IMWRITE_JPEG_SAMPLING_FACTOR_420]
+        _encode_params_cache[jpeg_quality] = encode_params
+    _success, encoded_image = cv2.imencode('.jpg', frame_bgr, encode_params)
+    # Return the encoded buffer as-is: workers share the process with the
+    # writer, so nothing downstream needs a bytes copy -- len() and write()
+    # both work on the uint8 array directly.
+    return encoded_image
+
+def open_capture(filepath, hwaccel):
+    # Request hardware decode from the backend where the OpenCV build
+    # supports it; older builds without CAP_PROP_HW_ACCELERATION just get
+    # the plain capture they always did.
+    accel_params = []
+    if hwaccel != 'none' and hasattr(cv2, 'CAP_PROP_HW_ACCELERATION') \
+            and hasattr(cv2, 'VIDEO_ACCELERATION_ANY'):
+        accel_params = [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY,
+                        cv2.CAP_PROP_HW_DEVICE, 0]
+
+    if hwaccel == 'cuda':
+        # Route FFmpeg's capture through NVDEC (cuvid) rather than the
+        # software decoder.
+        os.environ.setdefault('OPENCV_FFMPEG_CAPTURE_OPTIONS', 'hwaccel;cuda')
+        return cv2.VideoCapture(filepath, cv2.CAP_FFMPEG, accel_params) if accel_params \
+            else cv2.VideoCapture(filepath, cv2.CAP_FFMPEG)
+    if hwaccel == 'videotoolbox':
+        return cv2.VideoCapture(filepath, cv2.CAP_AVFOUNDATION, accel_params) if accel_params \
+            else cv2.VideoCapture(filepath, cv2.CAP_AVFOUNDATION)
+    if accel_params:
+        return cv2.VideoCapture(filepath, cv2.CAP_ANY, accel_params)
+    return cv2.VideoCapture(filepath)
+
 def get_metadata(filepath, args):
+    # Returns (ok, metadata, vcap); the capture stays open so extraction can
+    # reuse it instead of paying FFmpeg's open/index cost a second time.
+    # vcap is None when metadata came from ffprobe.
     metadata = {}
     if os.path.isfile(filepath):
         # Try OpenCV first (preserves original behavior)
-        if args.hwaccel == 'cuda':
-            vcap = cv2.VideoCapture(filepath, cv2.CAP_FFMPEG)
-        elif args.hwaccel == 'videotoolbox':
-            vcap = cv2.VideoCapture(filepath, cv2.CAP_AVFOUNDATION)
-        else:
-            vcap = cv2.VideoCapture(filepath)
+        vcap = open_capture(filepath, args.hwaccel)
 
         if vcap.isOpened():
             metadata['width'] = int(vcap.get(cv2.CAP_PROP_FRAME_WIDTH))
@@ -35,98 +116,274 @@ def get_metadata(filepath, args):
             duration = (frame_count / fps) if (fps > 0 and frame_count > 0) else 0.0
             metadata['duration_ms'] = int(duration * 1000.0)
             metadata['duration'] = int(duration)
-            vcap.release()
-            return (True, metadata)
+            metadata['fps'] = fps
+            return (True, metadata, vcap)
+        vcap.release()
 
         # Fallback: probe via ffprobe if available to validate the file and get metadata
         ok, md = _ffprobe_metadata(filepath)
         if ok:
-            return (True, md)
-    return (False, metadata)
+            return (True, md, None)
+    return (False, metadata, None)
+
+def process_frame(frame_bgr, target_size, interpolation, jpeg_quality, sharpen):
+    # Cheap SIMD pre-decimation: halve with pyrDown until within 2x of the
+    # target so the final interpolation touches far fewer pixels.
+    while frame_bgr.shape[1] > 2 * target_size[0] and frame_bgr.shape[0] > 2 * target_size[1]:
+        frame_bgr = cv2.pyrDown(frame_bgr)
+
+    # Reuse one destination buffer per thread instead of letting cv2.resize
+    # allocate a fresh output array for every frame.
+    resized_frame = getattr(_worker_state, 'resize_buf', None)
+    if resized_frame is None or resized_frame.shape[1::-1] != target_size:
+        resized_frame = np.empty((target_size[1], target_size[0], 3), dtype=np.uint8)
+        _worker_state.resize_buf = resized_frame
+    if frame_bgr.shape[1] < target_size[0]:
+        # Rare upscale; cubic looks better than area/linear here
+        interpolation = cv2.INTER_CUBIC
+    cv2.resize(frame_bgr, target_size, dst=resized_frame, interpolation=interpolation)
+    if sharpen:
+        resized_frame = sharpen_thumbnail(resized_frame)
+    return encode_jpeg(resized_frame, jpeg_quality)
+
+def encode_worker(task_queue, results, results_lock, pbar, target_size, interpolation, jpeg_quality, sharpen):
+    # Worker threads only resize and encode -- cv2.resize and the JPEG
+    # encoders release the GIL, so threads parallelize fine and frames are
+    # shared in-process with no pickling or IPC copies. All decoding happens
+    # sequentially in the main thread so the demuxer never seeks.
+    # The run-constant parameters arrive once per worker; queue items are
+    # bare (index, frame) pairs and finished frames land in the shared
+    # results dict for the producer to drain in order.
+    # Bind the per-iteration lookups once; at thousands of tasks the
+    # attribute resolution inside the loop is measurable interpreter tax.
+    get_task = task_queue.get
+    encode = process_frame
+    update = pbar.update
+    while True:
+        task = get_task()
+        if task is None:
+            break
+        index, frame_bgr = task
+        # A bad frame must not kill the thread: a dead worker never posts
+        # its result, which stalls the in-order drain and can deadlock the
+        # producer on the bounded queue. Record the failure and keep going.
+        try:
+            img_data = encode(frame_bgr, target_size, interpolation, jpeg_quality, sharpen)
+        except Exception as e:
+            print(f"Warning: Could not encode frame {index}: {e}", file=sys.stderr)
+            img_data = None
+        with results_lock:
+            results[index] = img_data
+        update()
+
+def extract_images_cuda(metadata, args):
+    # Fused GPU pipeline: NVDEC decode and resize both happen on-device and
+    # only the ~100KB thumbnail is downloaded for JPEG encode, instead of
+    # copying every full-resolution frame back over PCIe.
+    fps = metadata.get('fps', 0.0)
+    if fps <= 0:
+        return None
+    try:
+        reader = cv2.cudacodec.createVideoReader(args.filepath)
+    except cv2.error:
+        return None
 
-# Worker initializer to create a global VideoCapture object per worker process
-vcap = None
-def init_worker(filepath, hwaccel):
-    global vcap
-    if hwaccel == 'cuda':
-        vcap = cv2.VideoCapture(filepath, cv2.CAP_FFMPEG)
-    elif hwaccel == 'videotoolbox':
-        vcap = cv2.VideoCapture(filepath, cv2.CAP_AVFOUNDATION)
-    else:
-        vcap = cv2.VideoCapture(filepath)
+    _interpolation, jpeg_quality, _sharpen = presets[args.preset]
 
-def process_frame(task):
-    global vcap
-    timestamp, target_size, preset = task
+    frame_timestamps = range(args.offset, metadata['duration'], args.interval)
+    skip = max(1, int(round(fps * args.interval)))
+    offset_frames = int(round(fps * args.offset))
+    target_size = modes[args.mode]
 
-    # Map preset to interpolation algorithm and JPEG quality
-    if preset == 'fast':
-        interpolation = cv2.INTER_LINEAR
-        jpeg_quality = 80
-    elif preset == 'quality':
-        interpolation = cv2.INTER_LANCZOS4
-        jpeg_quality = 95
-    else:  # medium (default)
-        interpolation = cv2.INTER_AREA
-        jpeg_quality = 90
-
-    vcap.set(cv2.CAP_PROP_POS_MSEC, timestamp * 1000)
-    success, frame_bgr = vcap.read()
+    images = []
+    frame_idx = 0
+    with tqdm(total=len(frame_timestamps), desc="Processing frames", unit="frame", disable=args.silent) as pbar:
+        while len(images) < len(frame_timestamps):
+            try:
+                success, gpu_frame = reader.nextFrame()
+            except cv2.error:
+                break
+            if not success:
+                break
+            if frame_idx >= offset_frames and (frame_idx - offset_frames) % skip == 0:
+                gpu_small = cv2.cuda.resize(gpu_frame, target_size, interpolation=cv2.INTER_LINEAR)
+                small = gpu_small.download()
+                if small.ndim == 3 and small.shape[2] == 4:
+                    small = cv2.cvtColor(small, cv2.COLOR_BGRA2BGR)
+                images.append(encode_jpeg(small, jpeg_quality))
+                pbar.update()
+            frame_idx += 1
 
-    if not success:
-        print(f"Warning: Could not read frame at {timestamp}s", file=sys.stderr)
+    return images or None
+
+def extract_images_gstreamer(metadata, args):
+    # Drive a GStreamer pipeline that decodes (decodebin picks a hardware
+    # decoder when one is installed), decimates to one frame per interval,
+    # and scales to the target size before the frame ever reaches Python --
+    # appsink hands us ready-to-encode BGR thumbnails.
+    if not hasattr(cv2, 'CAP_GSTREAMER'):
         return None
 
-    resized_frame = cv2.resize(frame_bgr, target_size, interpolation=interpolation)
-    encode_params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
-    _success, encoded_image = cv2.imencode('.jpg', resized_frame, encode_params)
-    return (timestamp, encoded_image.tobytes())
+    width, height = modes[args.mode]
+    location = args.filepath.replace('\\', '\\\\').replace('"', '\\"')
+    pipeline = (
+        f'filesrc location="{location}" ! decodebin ! '
+        f'videorate ! video/x-raw,framerate=1/{max(1, int(args.interval))} ! '
+        f'videoscale ! videoconvert ! '
+        f'video/x-raw,format=BGR,width={width},height={height} ! '
+        f'appsink drop=false sync=false'
+    )
+    vcap = cv2.VideoCapture(pipeline, cv2.CAP_GSTREAMER)
+    if not vcap.isOpened():
+        vcap.release()
+        return None
 
-def extract_images(metadata, args):
-    # Quick pre-check: if OpenCV can't open with the selected backend, use FFmpeg fallback
-    pre_vcap = None
-    try:
-        if args.hwaccel == 'cuda':
-            pre_vcap = cv2.VideoCapture(args.filepath, cv2.CAP_FFMPEG)
-        elif args.hwaccel == 'videotoolbox':
-            pre_vcap = cv2.VideoCapture(args.filepath, cv2.CAP_AVFOUNDATION)
-        else:
-            pre_vcap = cv2.VideoCapture(args.filepath)
-        if not pre_vcap.isOpened():
-            if not args.silent:
-                print('Primary backend failed to open. Falling back to FFmpeg extraction...', file=sys.stderr)
-            return extract_images_ffmpeg(metadata, args)
-    finally:
-        if pre_vcap is not None:
-            pre_vcap.release()
+    _interpolation, jpeg_quality, _sharpen = presets[args.preset]
 
     frame_timestamps = range(args.offset, metadata['duration'], args.interval)
-    tasks = [(ts, modes[args.mode], args.preset) for ts in frame_timestamps]
+    lead_frames = args.offset // max(1, args.interval)
 
     images = []
-    # initializer and initargs are used to create a per-process VideoCapture object
-    # to avoid opening the file for every frame.
-    with multiprocessing.Pool(processes=args.jobs, initializer=init_worker, initargs=(args.filepath, args.hwaccel)) as pool:
-        # Calculate chunksize to balance parallel processing with sequential file access
-        num_processes = pool._processes or 1  # Fallback for unusual pool configurations
-        chunksize, extra = divmod(len(tasks), num_processes * 4)
-        if extra:
-            chunksize += 1
-        
-        with tqdm(total=len(tasks), desc="Processing frames", unit="frame", disable=args.silent) as pbar:
-            for result in pool.imap_unordered(process_frame, tasks, chunksize=chunksize):
-                if result is not None:
-                    images.append(result)
+    frame_idx = 0
+    with tqdm(total=len(frame_timestamps), desc="Processing frames", unit="frame", disable=args.silent) as pbar:
+        while len(images) < len(frame_timestamps):
+            success, frame_bgr = vcap.read()
+            if not success:
+                break
+            if frame_idx >= lead_frames:
+                images.append(encode_jpeg(frame_bgr, jpeg_quality))
                 pbar.update()
+            frame_idx += 1
+    vcap.release()
+
+    return images or None
+
+def extract_images(metadata, args, vcap=None):
+    # Generator: encoded thumbnails are yielded in timestamp order as they
+    # finish, so the writer can stream them to disk and peak memory stays at
+    # a handful of in-flight frames instead of the whole run's JPEGs.
+    if args.hwaccel == 'gstreamer':
+        images = extract_images_gstreamer(metadata, args)
+        if images:
+            if vcap is not None:
+                vcap.release()
+            yield from images
+            return
+        if not args.silent:
+            print('GStreamer pipeline unavailable; using primary backend...', file=sys.stderr)
+
+    if args.hwaccel == 'cuda' and hasattr(cv2, 'cudacodec'):
+        images = extract_images_cuda(metadata, args)
+        if images:
+            if vcap is not None:
+                vcap.release()
+            yield from images
+            return
+        if not args.silent:
+            print('CUDA decode unavailable; using primary backend...', file=sys.stderr)
+
+    # Reuse the capture get_metadata already opened when we have one
+    if vcap is None or not vcap.isOpened():
+        vcap = open_capture(args.filepath, args.hwaccel)
+
+    if not vcap.isOpened():
+        vcap.release()
+        if not args.silent:
+            print('Primary backend failed to open. Falling back to FFmpeg extraction...', file=sys.stderr)
+        yield from extract_images_ffmpeg(metadata, args)
+        return
 
-    if not images:
+    fps = float(vcap.get(cv2.CAP_PROP_FPS) or 0.0) or metadata.get('fps', 0.0)
+    if fps <= 0:
+        vcap.release()
+        if not args.silent:
+            print('Unknown frame rate; falling back to FFmpeg extraction...', file=sys.stderr)
+        yield from extract_images_ffmpeg(metadata, args)
+        return
+
+    frame_timestamps = range(args.offset, metadata['duration'], args.interval)
+    skip = max(1, int(round(fps * args.interval)))
+
+    # One coarse seek to the start offset instead of grabbing through every
+    # pre-offset frame; thumbnails are not frame-accurate anyway, so whatever
+    # keyframe the demuxer lands near is fine.
+    offset_frames = 0
+    if args.offset and not vcap.set(cv2.CAP_PROP_POS_MSEC, args.offset * 1000):
+        offset_frames = int(round(fps * args.offset))
+
+    target_size = modes[args.mode]
+    interpolation, jpeg_quality, sharpen = presets[args.preset]
+    # Bounded so only a handful of raw frames are in flight at once; the
+    # floor keeps low job counts from starving workers whenever the decoder
+    # stalls on a slow-to-demux stretch of the file.
+    task_queue = queue.Queue(maxsize=max(8, args.jobs * 4))
+
+    # Finished frames land here keyed by emit index; the decode loop drains
+    # whatever contiguous prefix is ready and yields it immediately. Failed
+    # reads are recorded as None so the in-order drain can skip past them.
+    results = {}
+    results_lock = threading.Lock()
+    next_out = 0
+    yielded = 0
+    with tqdm(total=len(frame_timestamps), desc="Processing frames", unit="frame", disable=args.silent) as pbar:
+        workers = [threading.Thread(target=encode_worker,
+                                    args=(task_queue, results, results_lock, pbar, target_size, interpolation, jpeg_quality, sharpen),
+                                    daemon=True)
+                   for _ in range(args.jobs)]
+        for w in workers:
+            w.start()
+
+        # Single sequential decode pass: grab() every frame (cheap, no decode
+        # to BGR), retrieve() only the frames that land on the interval grid.
+        frame_idx = 0
+        emitted = 0
+        while emitted < len(frame_timestamps):
+            if not vcap.grab():
+                break
+            if frame_idx >= offset_frames and (frame_idx - offset_frames) % skip == 0:
+                success, frame_bgr = vcap.retrieve()
+                if success:
+                    task_queue.put((emitted, frame_bgr))
+                else:
+                    print(f"Warning: Could not read frame at {args.offset + emitted * args.interval}s", file=sys.stderr)
+                    with results_lock:
+                        results[emitted] = None
+                    pbar.update()
+                emitted += 1
+
+                # Pass along whatever has finished, oldest first; collect
+                # under the lock, yield outside it so a slow writer never
+                # blocks the workers.
+                ready = []
+                with results_lock:
+                    while next_out in results:
+                        ready.append(results.pop(next_out))
+                        next_out += 1
+                for img_data in ready:
+                    if img_data is not None:
+                        yielded += 1
+                        yield img_data
+            frame_idx += 1
+        vcap.release()
+
+        for _ in workers:
+            task_queue.put(None)
+        for w in workers:
+            w.join()
+
+    # Workers are done; drain the tail without locking
+    while next_out < emitted:
+        img_data = results.pop(next_out, None)
+        next_out += 1
+        if img_data is not None:
+            yielded += 1
+            yield img_data
+
+    if not yielded:
         # If OpenCV path produced no images, fallback to FFmpeg extraction
         if not args.silent:
             print('No frames via OpenCV; falling back to FFmpeg extraction...', file=sys.stderr)
-        return extract_images_ffmpeg(metadata, args)
-
-    images.sort(key=lambda x: x[0])
-    return [img_data for _, img_data in images]
+        yield from extract_images_ffmpeg(metadata, args)
 
 def _ffprobe_metadata(filepath):
     if not shutil.which('ffprobe'):
@@ -173,6 +430,20 @@ def _ffprobe_metadata(filepath):
     except Exception:
         return (False, {})
 
+# Probed once per run; ffmpeg -hwaccels lists the methods this build supports
+_ffmpeg_hwaccels_cache = None
+def _ffmpeg_hwaccels():
+    global _ffmpeg_hwaccels_cache
+    if _ffmpeg_hwaccels_cache is None:
+        try:
+            out = subprocess.check_output(['ffmpeg', '-hide_banner', '-hwaccels'],
+                                          stderr=subprocess.DEVNULL)
+            lines = out.decode('utf-8', errors='ignore').splitlines()
+            _ffmpeg_hwaccels_cache = {line.strip() for line in lines[1:] if line.strip()}
+        except Exception:
+            _ffmpeg_hwaccels_cache = set()
+    return _ffmpeg_hwaccels_cache
+
 def _ffmpeg_qscale(preset: str):
     # Lower is better quality; keep filesize reasonable
     if preset == 'fast':
@@ -182,105 +453,154 @@ def _ffmpeg_qscale(preset: str):
     return 4
 
 def extract_images_ffmpeg(metadata, args):
+    # Generator: frames are yielded as they are parsed off the pipe, never
+    # accumulated.
     if not shutil.which('ffmpeg'):
         if not args.silent:
             print('FFmpeg not found in PATH; cannot fallback to FFmpeg extraction.', file=sys.stderr)
-        return []
+        return
 
     width, height = modes[args.mode]
     interval = max(1, int(args.interval))
     qscale = _ffmpeg_qscale(args.preset)
 
-    images = []
-    with tempfile.TemporaryDirectory(prefix='bif_frames_') as tmpdir:
-        out_pattern = os.path.join(tmpdir, '%08d.jpg')
+    # One linear decode pass writing an MJPEG stream to stdout; frames are
+    # split on JPEG end-of-image markers as they arrive, so no temp
+    # directory, no per-frame files, and no directory rescans.
+    def build_cmd(hw_flags, vf):
         cmd = ['ffmpeg', '-hide_banner', '-nostdin', '-loglevel', 'error', '-threads', '0']
+        cmd += hw_flags
         if args.offset:
             cmd += ['-ss', str(args.offset)]
         cmd += ['-i', args.filepath,
                 '-map', '0:v:0', '-an', '-sn', '-dn',
-                '-vf', f'fps=1/{interval}', '-s', f'{width}x{height}',
+                '-vf', vf,
                 '-qscale:v', str(qscale),
-                # Request machine-readable progress and write sequential JPEGs
-                '-progress', 'pipe:1',
-                '-y', out_pattern]
-
-        # Estimate expected images for a smoother progress bar
-        expected = max(0, int(max(0, metadata.get('duration', 0) - int(args.offset)) / interval))
-
+                '-f', 'image2pipe', '-vcodec', 'mjpeg', 'pipe:1']
+        return cmd
+
+    # Run decode (and on CUDA also the resize) on the GPU when the user asked
+    # for it and this ffmpeg build supports it. -hwaccels only reports
+    # compiled-in methods, not working hardware, so any accelerated attempt
+    # keeps the plain software command queued behind it as a retry.
+    vf_sw = f'fps=1/{interval},scale={width}:{height}:flags=area'
+    attempts = [([], vf_sw)]
+    hwaccels = _ffmpeg_hwaccels() if args.hwaccel in ('auto', 'cuda', 'videotoolbox') else set()
+    if args.hwaccel in ('auto', 'cuda') and 'cuda' in hwaccels:
+        attempts.insert(0, (['-hwaccel', 'cuda', '-hwaccel_output_format', 'cuda'],
+                            f'fps=1/{interval},scale_cuda={width}:{height},hwdownload,format=nv12'))
+    elif args.hwaccel in ('auto', 'videotoolbox') and 'videotoolbox' in hwaccels:
+        attempts.insert(0, (['-hwaccel', 'videotoolbox'], vf_sw))
+
+    # Estimate expected images for a smoother progress bar
+    expected = max(0, int(max(0, metadata.get('duration', 0) - int(args.offset)) / interval))
+
+    for attempt, (hw_flags, vf) in enumerate(attempts):
+        cmd = build_cmd(hw_flags, vf)
+        yielded = 0
         try:
-            last_count = 0
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+            buf = bytearray()
             with tqdm(total=expected, desc='Extracting', unit='img', disable=args.silent) as pbar:
-                proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, bufsize=1)
-                if proc.stdout is not None:
-                    for _ in proc.stdout:
-                        try:
-                            count = len(glob.glob(os.path.join(tmpdir, '*.jpg')))
-                            if count > expected:
-                                count = expected
-                            if count > last_count:
-                                pbar.update(count - last_count)
-                                last_count = count
-                        except Exception:
-                            pass
-                ret = proc.wait()
-                # Final sync to actual files produced
-                try:
-                    final_count = len(glob.glob(os.path.join(tmpdir, '*.jpg')))
-                    if final_count > expected:
-                        final_count = expected
-                    if final_count > last_count:
-                        pbar.update(final_count - last_count)
-                        last_count = final_count
-                except Exception:
-                    pass
+                while True:
+                    chunk = proc.stdout.read(1 << 16)
+                    if not chunk:
+                        break
+                    buf += chunk
+                    # MJPEG scan data escapes 0xFF bytes, so an EOI marker in the
+                    # buffer always terminates a complete frame.
+                    while True:
+                        end = buf.find(b'\xff\xd9')
+                        if end == -1:
+                            break
+                        img_data = bytes(buf[:end + 2])
+                        del buf[:end + 2]
+                        pbar.update()
+                        yielded += 1
+                        yield img_data
+            ret = proc.wait()
             if ret != 0:
                 raise subprocess.CalledProcessError(ret, cmd)
-        except subprocess.CalledProcessError:
-            if not args.silent:
-                print('FFmpeg extraction failed.', file=sys.stderr)
-            return []
-
-        # Collect frames in order
-        for fname in sorted(glob.glob(os.path.join(tmpdir, '*.jpg'))):
-            with open(fname, 'rb') as fp:
-                images.append(fp.read())
-
-    return images
-
-
-def assemble_bif(output_location, images, args):
-    magic_number = [0x89, 0x42, 0x49, 0x46, 0x0d, 0x0a, 0x1a, 0x0a]
+            return
+        except (OSError, subprocess.CalledProcessError) as e:
+            # No usable device fails before the first frame comes out; drop
+            # to the software command in that case. Once frames have been
+            # yielded the consumer has written them, so a truncated run must
+            # raise rather than restart or report a short success.
+            if yielded == 0 and attempt + 1 < len(attempts):
+                if not args.silent:
+                    print('FFmpeg hardware decode failed; retrying with software decode...', file=sys.stderr)
+                continue
+            raise RuntimeError('FFmpeg extraction failed') from e
+
+def assemble_bif(output_location, images, expected_count, args):
+    # images is any iterable of encoded JPEG buffers; they are written to
+    # disk as they arrive, so peak memory no longer scales with video
+    # length. Header and index are back-patched once the real count and
+    # sizes are known. Returns the number of images written.
+    magic_number = b'\x89\x42\x49\x46\x0d\x0a\x1a\x0a'
     version = 0
 
-    with open(output_location, 'wb') as f:
-        array.array('B', magic_number).tofile(f)
-        f.write(struct.pack('<I', version))
-        f.write(struct.pack('<I', len(images)))
-        f.write(struct.pack('<I', 1000 * args.interval))
-        array.array('B', [0x00] * 44).tofile(f)
-
-        bif_table_size = 8 * (len(images) + 1)
-        image_index_offset = 64 + bif_table_size
-
-        image_offsets = []
-        current_offset = image_index_offset
-        for img_data in images:
-            image_offsets.append(current_offset)
-            current_offset += len(img_data)
-
-        for i, offset in enumerate(image_offsets):
-            f.write(struct.pack('<I', i))
-            f.write(struct.pack('<I', offset))
-
-        f.write(struct.pack('<I', 0xffffffff))
-        f.write(struct.pack('<I', current_offset))
+    # An unknown duration means the index reservation cannot be sized ahead
+    # of the stream; buffer that (rare) run in memory to count it, as the
+    # pre-streaming code always did.
+    if expected_count <= 0:
+        images = list(images)
+        expected_count = len(images)
+
+    # Reserve room up front for the header plus an index sized for the
+    # expected frame count (one spare entry covers estimate rounding in the
+    # FFmpeg path). Index offsets are absolute, so any slack between a
+    # shorter-than-expected table and the first image is harmless padding.
+    data_start = 64 + 8 * (expected_count + 2)
+
+    # Assemble into a temp file and rename it over the destination only on
+    # success, so a run that extracts nothing or dies mid-stream never
+    # clobbers an existing BIF at that path.
+    tmp_location = output_location + '.part'
+    offsets = [data_start]
+    try:
+        # A wide write buffer coalesces the streamed JPEGs into full-sized
+        # writes instead of one syscall per image.
+        with open(tmp_location, 'wb', buffering=1 << 20) as f:
+            f.seek(data_start)
+            for img_data in itertools.islice(images, expected_count + 1):
+                f.write(img_data)
+                offsets.append(offsets[-1] + len(img_data))
+            num_images = len(offsets) - 1
+
+            # Build the whole index table as one little-endian uint32 array
+            # and write it in a single call instead of two packs per entry.
+            table = np.empty((num_images + 1, 2), dtype='<u4')
+            table[:-1, 0] = np.arange(num_images, dtype='<u4')
+            table[-1, 0] = 0xffffffff
+            table[:, 1] = offsets
+
+            header = bytearray()
+            header += magic_number
+            header += _BIF_HEADER.pack(version, num_images, 1000 * args.interval)
+            header += bytes(44)
+            header += table.tobytes()
+            f.seek(0)
+            f.write(header)
+    except BaseException:
+        try:
+            os.remove(tmp_location)
+        except OSError:
+            pass
+        raise
 
-        for img_data in images:
-            f.write(img_data)
+    if not num_images:
+        try:
+            os.remove(tmp_location)
+        except OSError:
+            pass
+        return 0
 
+    os.replace(tmp_location, output_location)
     if not args.silent:
         print(f"Successfully created BIF file: {output_location}")
+    return num_images
 
 def main():
     parser = ArgumentParser(description='Generate BIF files for Roku trick-play thumbnails.')
@@ -295,7 +615,7 @@ def main():
                         help='Generate SD resolution BIF file (default: HD)')
     parser.add_argument('-s', '--silent', dest='silent', action='store_true',
                         help='Suppress progress and diagnostic information')
-    parser.add_argument('--hwaccel', type=str, default='auto', choices=['auto', 'cuda', 'videotoolbox', 'none'],
+    parser.add_argument('--hwaccel', type=str, default='auto', choices=['auto', 'cuda', 'videotoolbox', 'gstreamer', 'none'],
                         help='Hardware acceleration to use (default: auto)')
     parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(),
                         help=f'Number of parallel jobs to run (default: {os.cpu_count()})')
@@ -303,7 +623,7 @@ def main():
                         help='Adjust for speed vs quality. (default: medium)')
     args = parser.parse_args()
 
-    success, metadata = get_metadata(args.filepath, args)
+    success, metadata, vcap = get_metadata(args.filepath, args)
     if not success:
         print('Error: Invalid or corrupt video file', file=sys.stderr)
         sys.exit(1)
@@ -318,16 +638,20 @@ def main():
         width = int(height * metadata['aspect'])
     modes[args.mode] = (width, height)
 
-    images = extract_images(metadata, args)
-    
-    if not images:
-        print("Error: No images were extracted. BIF file generation failed.", file=sys.stderr)
-        sys.exit(1)
-
     destination = args.output if args.output is not None else \
         f'{os.path.splitext(os.path.basename(args.filepath))[0]}-{args.mode.upper()}.bif'
-    
-    assemble_bif(destination, images, args)
+
+    # Stream extraction straight into the output file
+    expected_count = len(range(args.offset, metadata['duration'], args.interval))
+    try:
+        num_images = assemble_bif(destination, extract_images(metadata, args, vcap), expected_count, args)
+    except RuntimeError as e:
+        print(f"Error: {e}. BIF file generation failed.", file=sys.stderr)
+        sys.exit(1)
+
+    if not num_images:
+        print("Error: No images were extracted. BIF file generation failed.", file=sys.stderr)
+        sys.exit(1)
 
 if __name__ == '__main__':
     main()
@@ -1,21 +1,29 @@
 #!/usr/bin/env python3
 import os
 import sys
+import mmap
 import struct
 import cv2
 import numpy as np
 import random
 from argparse import ArgumentParser
 
+# Precompiled header layout: version, image count, interval (ms), 44 reserved
+_BIF_HEADER = struct.Struct('<III44x')
+
 def calculate_mse(image_a, image_b):
     """Calculates the Mean Squared Error between two images."""
-    err = np.sum((image_a.astype("float") - image_b.astype("float")) ** 2)
-    err /= float(image_a.shape[0] * image_a.shape[1])
-    return err
+    # Single SIMD pass in OpenCV; avoids allocating float64 copies of both
+    # images just to square the difference.
+    return cv2.norm(image_a, image_b, cv2.NORM_L2SQR) / float(image_a.shape[0] * image_a.shape[1])
 
-def validate_bif(bif_path, video_path, num_samples, mse_threshold, validate_all=False):
+def validate_bif(bif_path, video_path, num_samples, mse_threshold, validate_all=False, fast=False):
     """
     Validates a BIF file against its source video by comparing a sample of frames.
+
+    In fast mode only structural integrity is checked (JPEG start/end markers
+    and offset-table consistency); frames are never decoded or compared, which
+    is typically orders of magnitude faster for --all runs.
     """
     if not os.path.isfile(bif_path):
         print(f"Error: BIF file not found: {bif_path}", file=sys.stderr)
@@ -32,10 +40,7 @@ def validate_bif(bif_path, video_path, num_samples, mse_threshold, validate_all=
                 print("Error: Not a valid BIF file.", file=sys.stderr)
                 return False
 
-            version = struct.unpack('<I', f.read(4))[0]
-            num_images = struct.unpack('<I', f.read(4))[0]
-            interval_ms = struct.unpack('<I', f.read(4))[0]
-            f.read(44)  # Skip reserved area
+            version, num_images, interval_ms = _BIF_HEADER.unpack(f.read(_BIF_HEADER.size))
 
             print(f"BIF Version: {version}, Images: {num_images}, Interval: {interval_ms}ms")
 
@@ -43,16 +48,14 @@ def validate_bif(bif_path, video_path, num_samples, mse_threshold, validate_all=
                 print("Warning: BIF file contains no images to validate.")
                 return True
 
-            image_offsets = []
-            for _ in range(num_images):
-                f.read(4) # Skip timestamp index
-                offset = struct.unpack('<I', f.read(4))[0]
-                image_offsets.append(offset)
-            
-            # The last offset points to the end of the last image
-            end_of_table = f.tell()
-            f.seek(end_of_table + 4) # Skip 0xffffffff
-            final_offset = struct.unpack('<I', f.read(4))[0]
+            # Map the file once: the offset table is parsed as a single
+            # numpy view and JPEG payloads are sliced straight from the
+            # mapping, with no per-entry reads or per-frame seeks.
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            table = np.frombuffer(mm, dtype='<u4', count=2 * num_images, offset=64).reshape(num_images, 2)
+            image_offsets = table[:, 1].tolist()
+            # The sentinel entry's offset points to the end of the last image
+            final_offset = int(np.frombuffer(mm, dtype='<u4', count=2, offset=64 + 8 * num_images)[1])
             image_offsets.append(final_offset)
 
 
@@ -63,20 +66,37 @@ def validate_bif(bif_path, video_path, num_samples, mse_threshold, validate_all=
                 sample_indices = range(num_images)
                 print(f"\nValidating all {num_images} frames...")
             else:
-                sample_indices = random.sample(range(num_images), min(num_samples, num_images))
+                # Ascending order keeps every seek in the source video
+                # forward-only, so the decoder never re-decodes a GOP.
+                sample_indices = sorted(random.sample(range(num_images), min(num_samples, num_images)))
                 print(f"\nValidating {len(sample_indices)} random frames...")
 
+            # One capture for the whole run; reopening per frame re-parses
+            # the container and re-initializes the decoder every time.
+            # Fast mode never decodes, so it does not need the video at all.
+            vcap = None if fast else cv2.VideoCapture(video_path)
 
             for i, frame_index in enumerate(sample_indices):
                 print(f"  - Processing Frame Index: {frame_index}... ", end='')
                 
-                # 1. Extract image from BIF
+                # 1. Extract image from BIF (zero-copy view into the mapping)
                 offset = image_offsets[frame_index]
                 next_offset = image_offsets[frame_index + 1]
-                image_size = next_offset - offset
-                f.seek(offset)
-                bif_jpg_data = f.read(image_size)
-                bif_image = cv2.imdecode(np.frombuffer(bif_jpg_data, dtype=np.uint8), cv2.IMREAD_COLOR)
+                bif_jpg_data = np.frombuffer(mm, dtype=np.uint8, count=next_offset - offset, offset=offset)
+
+                if fast:
+                    # Structural check only: a sane size and JPEG SOI/EOI
+                    # markers at the slice boundaries.
+                    if next_offset > offset + 4 \
+                            and bif_jpg_data[:2].tobytes() == b'\xff\xd8' \
+                            and bif_jpg_data[-2:].tobytes() == b'\xff\xd9':
+                        print("OK (JPEG markers intact)")
+                    else:
+                        print("FAILED (corrupt or truncated JPEG data)")
+                        mismatches += 1
+                    continue
+
+                bif_image = cv2.imdecode(bif_jpg_data, cv2.IMREAD_COLOR)
 
                 if bif_image is None:
                     print("FAILED (could not decode image from BIF)")
@@ -85,10 +105,8 @@ def validate_bif(bif_path, video_path, num_samples, mse_threshold, validate_all=
 
                 # 2. Extract frame from source video
                 timestamp_ms = frame_index * interval_ms
-                vcap = cv2.VideoCapture(video_path)
                 vcap.set(cv2.CAP_PROP_POS_MSEC, timestamp_ms)
                 success, video_frame = vcap.read()
-                vcap.release()
 
                 if not success:
                     print(f"FAILED (could not read frame at {timestamp_ms}ms from video)")
@@ -96,8 +114,18 @@ def validate_bif(bif_path, video_path, num_samples, mse_threshold, validate_all=
                     continue
 
                 # 3. Normalize and Compare
-                resized_video_frame = cv2.resize(video_frame, (bif_image.shape[1], bif_image.shape[0]), interpolation=cv2.INTER_AREA)
-                mse = calculate_mse(bif_image, resized_video_frame)
+                # Cheap guard first: compare 32x32 downsamples, and only run
+                # the full-resolution comparison when the estimate is close
+                # enough to the threshold to be ambiguous. Clear matches and
+                # clear mismatches never touch the full frames.
+                small_bif = cv2.resize(bif_image, (32, 32), interpolation=cv2.INTER_AREA)
+                small_video = cv2.resize(video_frame, (32, 32), interpolation=cv2.INTER_AREA)
+                cheap_mse = calculate_mse(small_bif, small_video)
+                if cheap_mse < mse_threshold * 0.5 or cheap_mse > mse_threshold * 4:
+                    mse = cheap_mse
+                else:
+                    resized_video_frame = cv2.resize(video_frame, (bif_image.shape[1], bif_image.shape[0]), interpolation=cv2.INTER_AREA)
+                    mse = calculate_mse(bif_image, resized_video_frame)
 
                 if mse < mse_threshold:
                     print(f"OK (MSE: {mse:.2f})")
@@ -105,6 +133,9 @@ def validate_bif(bif_path, video_path, num_samples, mse_threshold, validate_all=
                     print(f"MISMATCH (MSE: {mse:.2f})")
                     mismatches += 1
 
+            if vcap is not None:
+                vcap.release()
+
     except Exception as e:
         print(f"An error occurred during validation: {e}", file=sys.stderr)
         return False
@@ -124,10 +155,11 @@ def main():
     parser.add_argument('source_video', metavar='SOURCE_VIDEO', type=str, help='Path to the original source video file')
     parser.add_argument('-n', '--samples', type=int, default=5, help='Number of random frames to sample for validation (default: 5)')
     parser.add_argument('--all', action='store_true', help='Validate all frames in the BIF file (overrides --samples)')
+    parser.add_argument('--fast', action='store_true', help='Check JPEG markers and offsets only; skip decoding and frame comparison')
     parser.add_argument('--mse-threshold', type=float, default=400.0, help='MSE threshold for a mismatch (default: 400.0)')
     args = parser.parse_args()
 
-    if not validate_bif(args.bif_file, args.source_video, args.samples, args.mse_threshold, args.all):
+    if not validate_bif(args.bif_file, args.source_video, args.samples, args.mse_threshold, args.all, args.fast):
         sys.exit(1)
 
 if __name__ == '__main__':